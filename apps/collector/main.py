@@ -54,6 +54,11 @@ except ImportError:
 
 livesplit_client = LiveSplitClient()
 
+try:
+    from .screenshot_catalog import ScreenshotCatalog
+except ImportError:
+    from screenshot_catalog import ScreenshotCatalog
+
 
 def load_keybindings():
     default_keybindings = {"f1": "imp", "f2": "soldier"}
@@ -306,6 +311,47 @@ def draw_bounding_box_and_text(image_pil, match_info):
 
 last_match_time = 0
 current_run_id = 1
+screenshot_catalog = ScreenshotCatalog(screenshots_dir, log=log_event)
+
+
+def backfill_screenshot_catalog():
+    """Queue saved screenshots that the catalog hasn't seen yet.
+
+    Covers matches.json entries (older ones have no "id", so the screenshot
+    path is used as the key) and loose PNGs at the top of screenshots_cache.
+    """
+    try:
+        with open(matches_json_path, "r") as f:
+            data = json.load(f)
+    except Exception:
+        data = []
+    known = screenshot_catalog.screenshot_paths()
+    for entry in data:
+        shot = entry.get("screenshot_path")
+        if not shot or shot in known:
+            continue
+        if not os.path.exists(os.path.join(screenshots_dir, shot)):
+            continue
+        known.add(shot)
+        bbox = None
+        tmpl = templates.get(entry.get("template"))
+        coords = entry.get("coordinates")
+        if tmpl is not None and coords:
+            t_h, t_w = tmpl.shape[:2]
+            bbox = ((coords["x"] - t_w // 2, coords["y"] - t_h // 2), (t_w, t_h))
+        screenshot_catalog.add(
+            entry.get("id") or shot,
+            shot,
+            bbox,
+            run_id=entry.get("run_id"),
+            marker=entry.get("marker"),
+            template=entry.get("template"),
+            livesplit_current_time=entry.get("livesplit_current_time"),
+        )
+
+    for fname in sorted(os.listdir(screenshots_dir)):
+        if fname.lower().endswith(".png") and fname not in known:
+            screenshot_catalog.add(fname, fname, None)
 
 
 def start_status_server(host: str = "127.0.0.1", port: int = 5555):
@@ -370,6 +416,8 @@ def format_livesplit_time_for_filename(livesplit_time_str):
 async def main_loop():
     global last_match_time, current_run_id
     setup_hotkeys()
+    screenshot_catalog.start()
+    backfill_screenshot_catalog()
 
     try:
         while True:
@@ -416,6 +464,20 @@ async def main_loop():
                 # Save screenshot with bounding box
                 img_with_box = draw_bounding_box_and_text(shot, results[0])
                 img_with_box.save(filepath)
+                screenshot_catalog.add(
+                    detection_uuid,
+                    f"run_{run_id}/{filename}",
+                    extra,
+                    run_id=run_id,
+                    marker=name.rsplit("/", 1)[0] if "/" in name else None,
+                    template=name,
+                    livesplit_current_time=(
+                        livesplit_info.get("livesplit_current_time")
+                        if livesplit_info
+                        else None
+                    ),
+                    created=timestamp_ms,
+                )
 
                 # Update matches JSON with the new filename structure
                 append_matches_to_json(
@@ -0,0 +1,253 @@
+"""
+Screenshot catalog for screenshots_cache/.
+
+The collector registers every saved detection screenshot here. A background
+worker writes a small JPEG thumbnail and a cropped marker preview, computes a
+perceptual hash to collapse near-identical frames, and enforces a size cap on
+the full-resolution originals (thumbnails and previews are kept).
+
+The catalog is NDJSON (screenshots_cache/catalog.ndjson), one record per line
+keyed by detection id. A later line replaces an earlier one with the same id,
+so updates are plain appends; the file is compacted when the worker starts.
+"screenshot_path" is the name the collector saved (as in matches.json), while
+"path" is where the original currently lives: the kept frame for duplicates,
+null once evicted.
+"""
+import json
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+CATALOG_NAME = "catalog.ndjson"
+THUMB_SIZE = (480, 270)
+PREVIEW_MARGIN = 48
+MAX_CACHE_BYTES = 2 * 1024**3
+DEDUP_DISTANCE = 8
+DEDUP_WINDOW = 20
+
+
+def perceptual_hash(img):
+    """64-bit DCT hash of a PIL image, as a 16-char hex string."""
+    gray = np.asarray(img.convert("L").resize((32, 32), Image.LANCZOS), np.float32)
+    low = cv2.dct(gray)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def hash_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def load_records(root):
+    """Read the catalog under root into {id: record}, newest line per id winning."""
+    records = {}
+    try:
+        with open(os.path.join(root, CATALOG_NAME), "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # partially written last line
+                records[record["id"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+class ScreenshotCatalog:
+    def __init__(self, root, max_bytes=MAX_CACHE_BYTES, log=print):
+        self.root = root
+        self.path = os.path.join(root, CATALOG_NAME)
+        self.max_bytes = max_bytes
+        self.log = log
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.records = load_records(root)
+
+    def _compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp, self.path)
+
+    def _append(self, *records):
+        with self._lock:
+            with open(self.path, "a") as f:
+                for record in records:
+                    self.records[record["id"]] = record
+                    f.write(json.dumps(record) + "\n")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        self._compact()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def __contains__(self, detection_id):
+        return detection_id in self.records
+
+    def screenshot_paths(self):
+        return {r["screenshot_path"] for r in self.records.values()}
+
+    def add(
+        self,
+        detection_id,
+        rel_path,
+        bbox,
+        run_id=None,
+        marker=None,
+        template=None,
+        livesplit_current_time=None,
+        created=None,
+    ):
+        """Queue a saved screenshot (path relative to the cache root) for indexing.
+
+        created is the capture time in epoch ms; when omitted (backfill) the
+        file's mtime is used, so old screenshots keep their original time.
+        """
+        self._queue.put(
+            {
+                "id": detection_id,
+                "run_id": run_id,
+                "marker": marker,
+                "template": template,
+                "livesplit_current_time": livesplit_current_time,
+                "path": rel_path.replace("\\", "/"),
+                "bbox": bbox,
+                "created": created,
+            }
+        )
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._index(job)
+                self._enforce_retention()
+            except Exception as e:
+                self.log(f"Screenshot catalog failed for {job['path']}: {e}")
+
+    def _index(self, job):
+        full_path = os.path.join(self.root, job["path"])
+        with Image.open(full_path) as img:
+            img.load()
+        record = {
+            "id": job["id"],
+            "run_id": job["run_id"],
+            "marker": job["marker"],
+            "template": job["template"],
+            "livesplit_current_time": job["livesplit_current_time"],
+            "created": job["created"] or int(os.path.getmtime(full_path) * 1000),
+            "screenshot_path": job["path"],
+            "path": job["path"],
+            "size": os.path.getsize(full_path),
+            "width": img.width,
+            "height": img.height,
+            "phash": perceptual_hash(img),
+            "duplicate_of": None,
+            "thumb": None,
+            "preview": None,
+        }
+
+        original = self._find_duplicate(record)
+        if original is not None:
+            record.update(
+                duplicate_of=original["id"],
+                path=original["path"],
+                size=0,
+                thumb=original["thumb"],
+                preview=original["preview"],
+            )
+            # Record first: a crash before the delete only leaves an extra file
+            self._append(record)
+            os.remove(full_path)
+            return
+
+        # Record the frame even if a rendition fails; the web falls back to
+        # the original, and no half-written renditions are left behind.
+        stem = os.path.splitext(job["path"])[0]
+        written = []
+        try:
+            thumb_rel = f"thumbs/{stem}.jpg"
+            thumb = img.convert("RGB")
+            thumb.thumbnail(THUMB_SIZE)
+            self._save(thumb, thumb_rel, quality=80)
+            written.append(thumb_rel)
+
+            if job["bbox"]:
+                (x, y), (w, h) = job["bbox"]
+                box = (
+                    max(0, x - PREVIEW_MARGIN),
+                    max(0, y - PREVIEW_MARGIN),
+                    min(img.width, x + w + PREVIEW_MARGIN),
+                    min(img.height, y + h + PREVIEW_MARGIN),
+                )
+                preview_rel = f"previews/{stem}.png"
+                self._save(img.crop(box), preview_rel)
+                written.append(preview_rel)
+                record["preview"] = preview_rel
+            record["thumb"] = thumb_rel
+        except Exception as e:
+            self.log(f"Screenshot catalog: no thumbnail/preview for {job['path']}: {e}")
+            record["preview"] = None
+            for rel in written:
+                try:
+                    os.remove(os.path.join(self.root, rel))
+                except OSError:
+                    pass
+
+        self._append(record)
+
+    def _save(self, img, rel_path, **kwargs):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        img.save(path, **kwargs)
+
+    def _find_duplicate(self, record):
+        """Most recent kept frame of the same run and marker that looks the same."""
+        checked = 0
+        for other in reversed(list(self.records.values())):
+            if other["run_id"] != record["run_id"] or other["marker"] != record["marker"]:
+                continue
+            if other.get("duplicate_of") or not other.get("path"):
+                continue
+            if hash_distance(other["phash"], record["phash"]) <= DEDUP_DISTANCE:
+                return other
+            checked += 1
+            if checked >= DEDUP_WINDOW:
+                break
+        return None
+
+    def _enforce_retention(self):
+        """Delete the oldest originals until the kept ones fit in max_bytes."""
+        kept = [
+            r for r in self.records.values() if r.get("path") and not r.get("duplicate_of")
+        ]
+        total = sum(r["size"] for r in kept)
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        count = 0
+        for record in sorted(kept, key=lambda r: r["created"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, record["path"]))
+            except FileNotFoundError:
+                pass
+            total -= record["size"]
+            count += 1
+            evicted.append(dict(record, path=None, size=0))
+            for dup in self.records.values():
+                if dup.get("duplicate_of") == record["id"]:
+                    evicted.append(dict(dup, path=None))
+        self._append(*evicted)
+        self.log(f"Screenshot retention: evicted {count} originals")
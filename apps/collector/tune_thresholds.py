@@ -0,0 +1,433 @@
+"""
+Offline threshold / ROI tuning for the collector's template matcher.
+
+Every template's TM_CCOEFF_NORMED score map is computed once per labeled frame
+and stored in a memory-mapped cache under data/score_cache/ (the peak score,
+the peak location and a max-pooled copy of the map). Threshold and ROI sweeps
+then run over that cache with NumPy instead of re-running cv2.matchTemplate,
+and report precision/recall per marker.
+
+Labeled frames:
+- checkpoints/*.png: cropped checkpoint banners, matched over the whole image
+- screenshots_cache/<screenshot_path>: collector screenshots referenced from
+  data/matches.json, matched over the same region as match_templates() and
+  labeled with the marker recorded for them; frames the screenshot catalog
+  collapsed as duplicates are read from the kept frame, evicted ones are
+  skipped with a warning
+
+Run: python tune_thresholds.py [--rebuild] [--roi x0,y0,x1,y1 ...] [--out report.json]
+
+Notes:
+- The cache is refreshed incrementally: unchanged frames keep their rows,
+  new or modified frames are re-matched. Changing any template rebuilds it.
+- ROIs are fractions of the score map (template top-left inside the match
+  region) and are snapped outward to the cache grid.
+- screenshots_cache frames are the annotated copies from
+  draw_bounding_box_and_text (red box and text at the match), and their
+  labels are the matcher's own >= 0.7 detections. Numbers on those frames are
+  biased towards the current threshold and skewed by the overlay; prefer
+  hand-labeled, unannotated frames (like checkpoints/) for real tuning.
+"""
+import argparse
+import glob
+import json
+import os
+
+import cv2
+import numpy as np
+
+try:
+    from .screenshot_catalog import load_records
+except ImportError:
+    from screenshot_catalog import load_records
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", ".."))
+
+markers_root = os.path.join(ROOT_DIR, "markers")
+screenshots_dir = os.path.join(ROOT_DIR, "screenshots_cache")
+checkpoints_dir = os.path.join(ROOT_DIR, "checkpoints")
+matches_json_path = os.path.join(ROOT_DIR, "data", "matches.json")
+cache_dir = os.path.join(ROOT_DIR, "data", "score_cache")
+
+CACHE_VERSION = 2
+GRID = (32, 32)
+CURRENT_THRESHOLD = 0.7
+NO_SCORE = -1.0
+
+
+def load_templates():
+    """Load marker templates keyed like main.py ("<marker>/<file>")."""
+    templates = {}
+    for root, dirs, files in os.walk(markers_root):
+        rel = os.path.relpath(root, markers_root)
+        marker_name = None if rel == "." else rel.replace("\\", "/")
+        for fname in sorted(files):
+            if fname.lower().endswith((".png", ".jpg", ".jpeg")):
+                key = f"{marker_name}/{fname}" if marker_name else fname
+                img_path = os.path.join(root, fname)
+                templates[key] = {
+                    "marker": marker_name,
+                    "mtime": os.path.getmtime(img_path),
+                    "image": cv2.imread(img_path, cv2.IMREAD_COLOR),
+                }
+    return dict(sorted(templates.items()))
+
+
+def load_labeled_frames():
+    """Return {relative path: {"region": bool, "labels": [markers]}} for all labeled frames."""
+    frames = {}
+    for path in sorted(glob.glob(os.path.join(checkpoints_dir, "*.png"))):
+        rel = os.path.relpath(path, ROOT_DIR).replace("\\", "/")
+        frames[rel] = {"region": False, "labels": ["checkpoint"]}
+
+    try:
+        with open(matches_json_path, "r") as f:
+            matches = json.load(f)
+    except Exception:
+        matches = []
+
+    # The collector's catalog deletes duplicate and evicted originals; a
+    # duplicate's record points at the kept frame it was collapsed into.
+    catalog = {r["screenshot_path"]: r for r in load_records(screenshots_dir).values()}
+    missing = 0
+    for entry in matches:
+        shot = entry.get("screenshot_path")
+        if not shot:
+            continue
+        marker = entry.get("marker")
+        template = entry.get("template") or ""
+        if not marker and "/" in template:
+            marker = template.rsplit("/", 1)[0]
+        if not marker:
+            continue
+        path = os.path.join(screenshots_dir, shot)
+        if not os.path.exists(path):
+            record = catalog.get(shot)
+            if not record or not record.get("path"):
+                missing += 1
+                continue
+            path = os.path.join(screenshots_dir, record["path"])
+            if not os.path.exists(path):
+                missing += 1
+                continue
+        rel = os.path.relpath(path, ROOT_DIR).replace("\\", "/")
+        frame = frames.setdefault(rel, {"region": True, "labels": []})
+        if marker not in frame["labels"]:
+            frame["labels"].append(marker)
+    if missing:
+        print(f"warning: {missing} screenshot(s) from matches.json are gone (evicted by the catalog?)")
+    return frames
+
+
+def get_match_region(frame):
+    """Same crop as main.get_match_region: the top-right quarter of the screen."""
+    h, w = frame.shape[:2]
+    return frame[0 : h // 2, w // 2 : w], (w // 2, 0)
+
+
+def pool_score_map(res, grid=GRID):
+    """Max-pool a score map onto a fixed grid.
+
+    Kept as float32 like the peaks, so an ROI covering every cell reproduces
+    the peak score exactly and per-cell thresholds match a full re-run.
+    """
+    gh, gw = grid
+    h, w = res.shape
+    if h < gh or w < gw:
+        res = cv2.resize(
+            res, (max(w, gw), max(h, gh)), interpolation=cv2.INTER_NEAREST
+        )
+        h, w = res.shape
+    rows = np.linspace(0, h, gh + 1).astype(int)[:-1]
+    cols = np.linspace(0, w, gw + 1).astype(int)[:-1]
+    pooled = np.maximum.reduceat(res, rows, axis=0)
+    return np.maximum.reduceat(pooled, cols, axis=1)
+
+
+def score_frame(frame, use_region, templates):
+    """Match every template against one frame; returns (peaks, locs, maps) rows."""
+    count = len(templates)
+    peaks = np.full(count, NO_SCORE, dtype=np.float32)
+    locs = np.full((count, 2), -1, dtype=np.int32)
+    maps = np.full((count,) + GRID, NO_SCORE, dtype=np.float32)
+    if frame is None:
+        return peaks, locs, maps
+
+    if use_region:
+        screen_np, (offset_x, offset_y) = get_match_region(frame)
+    else:
+        screen_np, (offset_x, offset_y) = frame, (0, 0)
+    screen_h, screen_w = screen_np.shape[:2]
+
+    for i, tmpl in enumerate(templates.values()):
+        image = tmpl["image"]
+        if image is None:
+            continue
+        t_h, t_w = image.shape[:2]
+        if t_h > screen_h or t_w > screen_w:
+            continue
+        res = cv2.matchTemplate(screen_np, image, cv2.TM_CCOEFF_NORMED)
+        res = np.nan_to_num(res, nan=NO_SCORE, posinf=1.0, neginf=NO_SCORE)
+        _, max_val, _, max_loc = cv2.minMaxLoc(res)
+        peaks[i] = max_val
+        locs[i] = (max_loc[0] + offset_x, max_loc[1] + offset_y)
+        maps[i] = pool_score_map(res)
+    return peaks, locs, maps
+
+
+def _cache_path(name):
+    return os.path.join(cache_dir, name)
+
+
+def load_cache():
+    """Open an existing cache read-only; returns None when missing or unreadable."""
+    try:
+        with open(_cache_path("index.json"), "r") as f:
+            index = json.load(f)
+        if index.get("version") != CACHE_VERSION:
+            return None
+        return {
+            "index": index,
+            "peaks": np.load(_cache_path("peaks.npy"), mmap_mode="r"),
+            "locs": np.load(_cache_path("peak_locs.npy"), mmap_mode="r"),
+            "maps": np.load(_cache_path("maps.npy"), mmap_mode="r"),
+        }
+    except Exception:
+        return None
+
+
+def build_cache(rebuild=False):
+    """Bring data/score_cache/ up to date with the labeled frames and templates."""
+    templates = load_templates()
+    frames = load_labeled_frames()
+    if not frames:
+        raise SystemExit("No labeled frames found in checkpoints/ or screenshots_cache/")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    template_index = [
+        {"key": key, "marker": t["marker"], "mtime": t["mtime"]}
+        for key, t in templates.items()
+    ]
+    frame_index = []
+    for rel, info in frames.items():
+        path = os.path.join(ROOT_DIR, rel)
+        stat = os.stat(path)
+        frame_index.append(
+            {
+                "path": rel,
+                "region": info["region"],
+                "labels": info["labels"],
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+            }
+        )
+
+    old = None if rebuild else load_cache()
+    old_rows = {}
+    if old and old["index"]["templates"] == template_index:
+        for row, f in enumerate(old["index"]["frames"]):
+            old_rows[(f["path"], f["mtime"], f["size"], f["region"])] = row
+
+    shape = (len(frame_index), len(template_index))
+    peaks = np.lib.format.open_memmap(
+        _cache_path("peaks.tmp.npy"), mode="w+", dtype=np.float32, shape=shape
+    )
+    locs = np.lib.format.open_memmap(
+        _cache_path("peak_locs.tmp.npy"), mode="w+", dtype=np.int32, shape=shape + (2,)
+    )
+    maps = np.lib.format.open_memmap(
+        _cache_path("maps.tmp.npy"), mode="w+", dtype=np.float32, shape=shape + GRID
+    )
+
+    scored = 0
+    for row, f in enumerate(frame_index):
+        old_row = old_rows.get((f["path"], f["mtime"], f["size"], f["region"]))
+        if old_row is not None:
+            peaks[row] = old["peaks"][old_row]
+            locs[row] = old["locs"][old_row]
+            maps[row] = old["maps"][old_row]
+            continue
+        frame = cv2.imread(os.path.join(ROOT_DIR, f["path"]), cv2.IMREAD_COLOR)
+        peaks[row], locs[row], maps[row] = score_frame(frame, f["region"], templates)
+        scored += 1
+
+    for arr in (peaks, locs, maps):
+        arr.flush()
+    # Release every mapping before swapping files (required on Windows).
+    del peaks, locs, maps, old
+    for name in ("peaks", "peak_locs", "maps"):
+        os.replace(_cache_path(f"{name}.tmp.npy"), _cache_path(f"{name}.npy"))
+    with open(_cache_path("index.json"), "w") as f:
+        json.dump(
+            {
+                "version": CACHE_VERSION,
+                "grid": list(GRID),
+                "templates": template_index,
+                "frames": frame_index,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Score cache: {len(frame_index)} frames, {scored} re-matched")
+    return load_cache()
+
+
+def roi_mask(roi, grid=GRID):
+    """Boolean cell mask for a fractional (x0, y0, x1, y1) ROI, snapped outward."""
+    gh, gw = grid
+    x0, y0, x1, y1 = roi
+    cols = np.arange(gw)
+    rows = np.arange(gh)
+    col_in = ((cols + 1) / gw > x0) & (cols / gw < x1)
+    row_in = ((rows + 1) / gh > y0) & (rows / gh < y1)
+    return row_in[:, None] & col_in[None, :]
+
+
+def marker_scores(template_scores, scored, templates):
+    """Collapse (frames, templates) scores to (frames, markers) by taking the max.
+
+    Also returns a (frames, markers) mask of frames where at least one of the
+    marker's templates fit inside the image and was actually matched.
+    """
+    markers = sorted({t["marker"] or t["key"] for t in templates})
+    shape = (template_scores.shape[0], len(markers))
+    scores = np.full(shape, NO_SCORE, np.float32)
+    valid = np.zeros(shape, dtype=bool)
+    for i, t in enumerate(templates):
+        col = markers.index(t["marker"] or t["key"])
+        np.maximum(scores[:, col], template_scores[:, i], out=scores[:, col])
+        valid[:, col] |= scored[:, i]
+    return markers, scores, valid
+
+
+def sweep(scores, labels, valid, thresholds):
+    """Vectorized precision/recall for every (marker, threshold) pair.
+
+    Frames a marker could not be scored on are left out of its counts.
+    """
+    pred = scores[:, :, None] >= thresholds[None, None, :]
+    pred &= valid[:, :, None]
+    pos = (labels & valid)[:, :, None]
+    tp = (pred & pos).sum(axis=0)
+    fp = (pred & ~pos).sum(axis=0)
+    fn = (~pred & pos).sum(axis=0)
+    precision = np.divide(tp, tp + fp, out=np.ones(tp.shape), where=(tp + fp) > 0)
+    recall = np.divide(tp, tp + fn, out=np.zeros(tp.shape), where=(tp + fn) > 0)
+    denom = precision + recall
+    f1 = np.divide(2 * precision * recall, denom, out=np.zeros(tp.shape), where=denom > 0)
+    return {"tp": tp, "fp": fp, "fn": fn, "precision": precision, "recall": recall, "f1": f1}
+
+
+def evaluate(cache, rois, thresholds):
+    index = cache["index"]
+    templates = index["templates"]
+    frames = index["frames"]
+    # Templates larger than the (cropped) frame are never matched; see score_frame
+    scored = np.asarray(cache["locs"])[..., 0] >= 0
+
+    results = []
+    for roi in rois:
+        if roi is None:
+            template_scores = np.asarray(cache["peaks"], dtype=np.float32)
+        else:
+            mask = roi_mask(roi, tuple(index["grid"]))
+            template_scores = np.asarray(cache["maps"][..., mask], dtype=np.float32).max(axis=-1)
+        markers, scores, valid = marker_scores(template_scores, scored, templates)
+        labels = np.array(
+            [[m in f["labels"] for m in markers] for f in frames], dtype=bool
+        )
+        stats = sweep(scores, labels, valid, thresholds)
+        current = int(np.abs(thresholds - CURRENT_THRESHOLD).argmin())
+
+        per_marker = {}
+        for j, marker in enumerate(markers):
+            best = int(stats["f1"][j].argmax())
+            per_marker[marker] = {
+                "positives": int((labels[:, j] & valid[:, j]).sum()),
+                "unscored_positives": int((labels[:, j] & ~valid[:, j]).sum()),
+                "best": {
+                    "threshold": round(float(thresholds[best]), 4),
+                    "precision": float(stats["precision"][j, best]),
+                    "recall": float(stats["recall"][j, best]),
+                    "f1": float(stats["f1"][j, best]),
+                },
+                "current": {
+                    "threshold": CURRENT_THRESHOLD,
+                    "precision": float(stats["precision"][j, current]),
+                    "recall": float(stats["recall"][j, current]),
+                    "f1": float(stats["f1"][j, current]),
+                },
+                "curve": {
+                    "precision": stats["precision"][j].round(4).tolist(),
+                    "recall": stats["recall"][j].round(4).tolist(),
+                },
+            }
+        results.append({"roi": roi, "markers": per_marker})
+    return results
+
+
+def print_report(results):
+    for result in results:
+        roi = result["roi"]
+        print(f"\nROI: {'full region' if roi is None else roi}")
+        print(f"{'marker':40} {'pos':>4}  {'@0.70 P/R':>11}  {'best thr':>8}  {'P/R':>11}  {'F1':>5}")
+        for marker, m in result["markers"].items():
+            cur, best = m["current"], m["best"]
+            print(
+                f"{marker:40} {m['positives']:>4}  "
+                f"{cur['precision']:.2f}/{cur['recall']:.2f}    "
+                f"{best['threshold']:>8.2f}  "
+                f"{best['precision']:.2f}/{best['recall']:.2f}  {best['f1']:>5.2f}"
+            )
+        for marker, m in result["markers"].items():
+            if m["unscored_positives"]:
+                print(
+                    f"warning: {marker}: {m['unscored_positives']} labeled frame(s) "
+                    "smaller than every template were excluded"
+                )
+
+
+def parse_step(value):
+    try:
+        step = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid step: {value}")
+    if step <= 0:
+        raise argparse.ArgumentTypeError(f"step must be positive: {value}")
+    return step
+
+
+def parse_roi(value):
+    try:
+        roi = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid ROI: {value}")
+    if len(roi) != 4 or not (0 <= roi[0] < roi[2] <= 1 and 0 <= roi[1] < roi[3] <= 1):
+        raise argparse.ArgumentTypeError(f"ROI must be x0,y0,x1,y1 fractions: {value}")
+    return roi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rebuild", action="store_true", help="recompute every score map")
+    parser.add_argument("--roi", action="append", type=parse_roi, default=[],
+                        help="fractional x0,y0,x1,y1 ROI to sweep (repeatable)")
+    parser.add_argument("--min", type=float, default=0.5, help="lowest threshold")
+    parser.add_argument("--max", type=float, default=0.99, help="highest threshold")
+    parser.add_argument("--step", type=parse_step, default=0.01, help="threshold step")
+    parser.add_argument("--out", help="write the full report (with curves) as JSON")
+    args = parser.parse_args()
+
+    cache = build_cache(rebuild=args.rebuild)
+    thresholds = np.round(np.arange(args.min, args.max + args.step / 2, args.step), 4)
+    results = evaluate(cache, [None] + args.roi, thresholds)
+    print_report(results)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"thresholds": thresholds.tolist(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,16 @@ Run: python3 pyqt_overlay_keystroke_recorder.py
 Notes:
 - keyboard and mouse libraries require appropriate permissions on some OSes.
 - On Linux, run as root or give uinput permissions for global hooks.
+- Hook callbacks only append to a queue; a single consumer thread persists
+  events in batches and the overlay repaints at most once per display frame
+  (its frame timer is idle while there is no input).
 """
 import sys
 import sqlite3
 import threading
 import time
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timezone
 
 import keyboard
 import mouse
@@ -43,19 +47,28 @@ class EventDB:
                     code TEXT,
                     action TEXT,
                     x INTEGER,
-                    y INTEGER
+                    y INTEGER,
+                    queue_ms REAL
                 )
                 """
             )
+            # Databases created before latency tracking lack the column
+            columns = {row[1] for row in cur.execute("PRAGMA table_info(events)")}
+            if "queue_ms" not in columns:
+                cur.execute("ALTER TABLE events ADD COLUMN queue_ms REAL")
             self.conn.commit()
 
     def insert(self, event_type, code=None, action=None, x=None, y=None):
         ts = datetime.utcnow().isoformat() + "Z"
+        self.insert_many([(ts, event_type, code, action, x, y, None)])
+
+    def insert_many(self, rows):
+        """Insert (ts, event_type, code, action, x, y, queue_ms) rows in one transaction."""
         with self.lock:
             cur = self.conn.cursor()
-            cur.execute(
-                "INSERT INTO events (ts, event_type, code, action, x, y) VALUES (?, ?, ?, ?, ?, ?)",
-                (ts, event_type, code, action, x, y),
+            cur.executemany(
+                "INSERT INTO events (ts, event_type, code, action, x, y, queue_ms) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
             )
             self.conn.commit()
 
@@ -67,6 +80,9 @@ class EventDB:
 
 
 class Overlay(QtWidgets.QWidget):
+    # Emitted from the recorder thread; queued onto the GUI thread
+    _wake = QtCore.pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowFlags(
@@ -94,6 +110,36 @@ class Overlay(QtWidgets.QWidget):
         self._fade_timer.setInterval(1200)  # ms
         self._fade_timer.timeout.connect(self.clear_label)
 
+        # Latest text posted from the recorder thread; applied once per display
+        # frame. The frame timer only runs while new text keeps arriving.
+        self._pending_text = None
+        self._armed = False
+        screen = QtWidgets.QApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen else 0
+        self._frame_timer = QtCore.QTimer()
+        self._frame_timer.setInterval(int(1000 / (refresh_rate or 60)))
+        self._frame_timer.timeout.connect(self._apply_pending)
+        self._wake.connect(self._frame_timer.start, QtCore.Qt.QueuedConnection)
+
+    def post_hit(self, text: str):
+        # Thread-safe: swaps a reference and wakes the timer once per burst
+        self._pending_text = text
+        if not self._armed:
+            self._armed = True
+            self._wake.emit()
+
+    def _apply_pending(self):
+        text, self._pending_text = self._pending_text, None
+        if text is not None:
+            self.show_hit(text)
+            return
+        # Disarm first, then re-check so a post_hit racing with us isn't lost
+        self._armed = False
+        if self._pending_text is None:
+            self._frame_timer.stop()
+        else:
+            self._armed = True
+
     def show_hit(self, text: str):
         self.label.setText(text)
         self._fade_timer.start()
@@ -120,17 +166,22 @@ class Recorder:
         self.overlay = overlay
         self.running = False
         self._threads = []
+        # deque.append/popleft are atomic, so hooks never block on a lock
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self.latencies_ms = deque(maxlen=10000)
 
     def start(self):
         self.running = True
-        # Keyboard listeners
-        t1 = threading.Thread(target=self._keyboard_worker, daemon=True)
-        t1.start()
-        self._threads.append(t1)
-        # Mouse listeners
-        t2 = threading.Thread(target=self._mouse_worker, daemon=True)
-        t2.start()
-        self._threads.append(t2)
+        t = threading.Thread(target=self._consumer, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+        # Register press and release callbacks for tracked keys
+        for key in TRACKED_KEYS:
+            keyboard.on_press_key(key, lambda e, k=key: self._push("keyboard", k, "down"))
+            keyboard.on_release_key(key, lambda e, k=key: self._push("keyboard", k, "up"))
+        mouse.hook(self._on_mouse)
 
     def stop(self):
         self.running = False
@@ -142,55 +193,63 @@ class Recorder:
             mouse.unhook_all()
         except Exception:
             pass
+        self._wakeup.set()
+        for t in self._threads:
+            t.join(timeout=2)
+
+    def _push(self, event_type, code, action, x=None, y=None):
+        # Runs inside the OS hook: capture timestamps and hand off, nothing else
+        self._queue.append((time.perf_counter(), time.time(), event_type, code, action, x, y))
+        self._wakeup.set()
+
+    def _on_mouse(self, event):
+        # mouse has no per-type hook, so drop move/wheel events before any work
+        if event.__class__ is not mouse.ButtonEvent:
+            return
+        action = "down" if event.event_type == "down" else "up"
+        x, y = mouse.get_position()
+        self._push("mouse", event.button, action, x, y)
+
+    def _consumer(self):
+        while self.running or self._queue:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            batch = []
+            while self._queue:
+                batch.append(self._queue.popleft())
+            if batch:
+                self._persist(batch)
+
+    def _persist(self, batch):
+        # Only the newest event is visible; post it before touching the disk
+        _, _, event_type, code, action, _, _ = batch[-1]
+        prefix = "MOUSE " if event_type == "mouse" else ""
+        self.overlay.post_hit(f"{prefix}{code.upper()} {action.upper()}")
+
+        # queue_ms (stored per row): hook callback -> dequeued by the consumer
+        dequeued = time.perf_counter()
+        rows = []
+        for hooked_at, wall, event_type, code, action, x, y in batch:
+            ts = datetime.fromtimestamp(wall, timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+            rows.append((ts, event_type, code, action, x, y, (dequeued - hooked_at) * 1000))
+        try:
+            self.db.insert_many(rows)
+        except Exception as e:
+            print(f"Failed to persist {len(rows)} events: {e}", file=sys.stderr)
+            return
 
-    def _keyboard_worker(self):
-        # Register press and release callbacks for tracked keys
-        for key in TRACKED_KEYS:
-            # Map 'space' to the keyboard library name
-            name = key
-            keyboard.on_press_key(name, lambda e, k=key: self._on_key(e, k, "down"))
-            keyboard.on_release_key(name, lambda e, k=key: self._on_key(e, k, "up"))
-
-        # Keep thread alive while running
-        while self.running:
-            time.sleep(0.2)
-
-    def _on_key(self, event, key, action):
-        # event.scan_code and name available
-        code = key
-        self.db.insert("keyboard", code=code, action=action)
-        # Update overlay. Use main thread via Qt signal invocation
-        text = f"{key.upper()} {action.upper()}"
-        QtCore.QMetaObject.invokeMethod(
-            self.overlay,
-            "show_hit",
-            QtCore.Qt.QueuedConnection,
-            QtCore.Q_ARG(str, text),
-        )
+        # latencies_ms: hook callback -> SQLite commit finished
+        committed = time.perf_counter()
+        for hooked_at, *_ in batch:
+            self.latencies_ms.append((committed - hooked_at) * 1000)
 
-    def _mouse_worker(self):
-        # mouse library sends events for all buttons
-        def on_mouse(event):
-            try:
-                if isinstance(event, mouse.ButtonEvent):
-                    button = event.button  # e.g. 'left'
-                    action = "down" if event.event_type == "down" else "up"
-                    x, y = event.x, event.y
-                    self.db.insert("mouse", code=button, action=action, x=x, y=y)
-                    text = f"MOUSE {button.upper()} {action.upper()}"
-                    QtCore.QMetaObject.invokeMethod(
-                        self.overlay,
-                        "show_hit",
-                        QtCore.Qt.QueuedConnection,
-                        QtCore.Q_ARG(str, text),
-                    )
-            except Exception:
-                pass
-
-        mouse.hook(on_mouse)
-        # Keep thread alive while running
-        while self.running:
-            time.sleep(0.2)
+    def latency_summary(self):
+        if not self.latencies_ms:
+            return "no events recorded"
+        values = sorted(self.latencies_ms)
+        p50 = values[len(values) // 2]
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        return f"hook-to-commit latency over {len(values)} events: p50 {p50:.2f} ms, p95 {p95:.2f} ms, max {values[-1]:.2f} ms"
 
 
 # --- Main Application ---
@@ -207,6 +266,7 @@ def main():
     def on_exit():
         recorder.stop()
         db.close()
+        print(recorder.latency_summary())
 
     app.aboutToQuit.connect(on_exit)
 
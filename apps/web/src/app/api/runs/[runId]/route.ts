@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { promises as fs } from 'fs';
 import path from 'path';
+import { listScreenshots, type Screenshot } from '@/lib/screenshotCatalog';
 
 type Match = {
   template: string;
@@ -14,11 +15,6 @@ type Match = {
   screenshot_path?: string;
 };
 
-type Screenshot = {
-  name: string;
-  mtime: number;
-};
-
 function parseLiveSplitSeconds(v?: string | null): number | null {
   if (!v) return null;
   const m = v.trim().match(/^(\d{2}):(\d{2}):(\d{2})(?:[\.,](\d+))?$/);
@@ -30,36 +26,6 @@ function parseLiveSplitSeconds(v?: string | null): number | null {
   return hh * 3600 + mm * 60 + ss + frac;
 }
 
-async function getScreenshots(): Promise<Screenshot[]> {
-  try {
-    const primary = path.join(process.cwd(), '..', '..', 'screenshots_cache');
-    const alt = path.join(process.cwd(), '..', '..', '..', 'screenshots_cache');
-    const dir = await fs
-      .stat(primary)
-      .then(() => primary)
-      .catch(async () => {
-        try {
-          await fs.stat(alt);
-          return alt;
-        } catch {
-          return primary;
-        }
-      });
-    const entries = await fs.readdir(dir);
-    const files = await Promise.all(
-      entries
-        .filter((n) => n.toLowerCase().endsWith('.png'))
-        .map(async (name) => {
-          const stat = await fs.stat(path.join(dir, name));
-          return { name, mtime: stat.mtimeMs };
-        })
-    );
-    return files;
-  } catch {
-    return [];
-  }
-}
-
 function findClosestScreenshot(matchTime: string, screenshots: Screenshot[]): string | null {
   if (!screenshots.length) return null;
   
@@ -111,8 +77,8 @@ export async function GET(
     const content = await fs.readFile(file, 'utf-8');
     const allMatches: Match[] = JSON.parse(content);
     
-    // Get available screenshots
-    const screenshots = await getScreenshots();
+    // Get available screenshots (from the collector's catalog when present)
+    const screenshots = await listScreenshots();
     
     // Filter matches for this run
     const runMatches = allMatches
@@ -1,26 +1,61 @@
 import { NextResponse } from 'next/server';
 import { promises as fs } from 'fs';
 import path from 'path';
+import { findRecord, getScreenshotsDir } from '@/lib/screenshotCatalog';
 
+const CONTENT_TYPES: Record<string, string> = {
+  '.png': 'image/png',
+  '.jpg': 'image/jpeg',
+};
+
+// ?size=thumb|preview serves the catalog's small renditions; the original is
+// served otherwise, falling back to a rendition once it has been evicted.
 export async function GET(
-  _req: Request,
+  req: Request,
   ctx: { params: { name: string } }
 ) {
   try {
     const name = ctx.params.name;
-    if (!/^[A-Za-z0-9_.-]+\.png$/i.test(name)) return new NextResponse('Bad Request', { status: 400 });
-    const filePath = path.join(process.cwd(), '..', '..', 'screenshots_cache', name);
-    const buf = await fs.readFile(filePath);
-    return new NextResponse(new Uint8Array(buf), {
-      headers: {
-        'Content-Type': 'image/png',
-        'Cache-Control': 'public, max-age=31536000, immutable',
-      },
-    });
-  } catch (e: any) {
-    if (e && e.code === 'ENOENT') return new NextResponse('Not Found', { status: 404 });
+    if (!/^(run_\d+\/)?[A-Za-z0-9_.-]+\.png$/i.test(name) && !/^[0-9a-f-]{36}$/i.test(name)) {
+      return new NextResponse('Bad Request', { status: 400 });
+    }
+    const size = new URL(req.url).searchParams.get('size');
+
+    const record = await findRecord(name);
+    let candidates: (string | null)[];
+    if (!record) {
+      candidates = [name];
+    } else if (size === 'thumb') {
+      candidates = [record.thumb, record.path, record.preview];
+    } else if (size === 'preview') {
+      candidates = [record.preview, record.path, record.thumb];
+    } else {
+      candidates = [record.path, record.preview, record.thumb];
+    }
+
+    // Only the requested rendition is immutable; fallbacks (a thumb not yet
+    // written, an evicted original) must not be cached under this URL.
+    const wantsRendition = size === 'thumb' || size === 'preview';
+    const dir = await getScreenshotsDir();
+    for (const [i, rel] of candidates.entries()) {
+      if (!rel) continue;
+      const exact = i === 0 && (record !== undefined || !wantsRendition);
+      const filePath = path.join(dir, rel);
+      if (!filePath.startsWith(dir + path.sep)) continue;
+      try {
+        const buf = await fs.readFile(filePath);
+        return new NextResponse(new Uint8Array(buf), {
+          headers: {
+            'Content-Type': CONTENT_TYPES[path.extname(rel).toLowerCase()] || 'application/octet-stream',
+            'Cache-Control': exact ? 'public, max-age=31536000, immutable' : 'no-cache',
+          },
+        });
+      } catch (e: any) {
+        if (!e || e.code !== 'ENOENT') throw e;
+      }
+    }
+    return new NextResponse('Not Found', { status: 404 });
+  } catch {
     return new NextResponse('Server Error', { status: 500 });
   }
 }
-
-
@@ -328,7 +328,7 @@ export default function LogsPage() {
                           {log.screenshot_path && (
                             <div className="flex-shrink-0 w-24 h-16 rounded-lg overflow-hidden bg-muted">
                               <img
-                                src={`/api/screenshots/${encodeURIComponent(log.screenshot_path)}`}
+                                src={`/api/screenshots/${encodeURIComponent(log.screenshot_path)}?size=thumb`}
                                 alt={log.details?.template || 'Screenshot'}
                                 className="w-full h-full object-cover"
                                 loading="lazy"
@@ -1623,7 +1623,7 @@ export default function HomePage() {
                         <img
                           src={`/api/screenshots/${
                             encodeURIComponent(run.preview_screenshot)
-                          }`}
+                          }?size=thumb`}
                           alt={`Run ${run.run_id} preview`}
                           className="w-full h-full object-cover"
                           loading="lazy"
@@ -1707,7 +1707,7 @@ export default function HomePage() {
                   >
                     <div className="aspect-video w-full overflow-hidden rounded-t-lg bg-muted">
                       <img
-                        src={`/api/screenshots/${encodeURIComponent(f.name)}`}
+                        src={`/api/screenshots/${encodeURIComponent(f.name)}?size=thumb`}
                         alt={f.name}
                         className="w-full h-full object-cover group-hover:scale-[1.05] transition-transform"
                         loading="lazy"
@@ -434,7 +434,7 @@ export default function RunDetailPage() {
                   <img
                     src={`/api/screenshots/${encodeURIComponent(
                       match.screenshot_filename || match.image || match.template
-                    )}`}
+                    )}?size=thumb`}
                     alt={match.template}
                     className="w-full h-full object-cover"
                     loading="lazy"
@@ -0,0 +1,143 @@
+import { promises as fs } from 'fs';
+import path from 'path';
+
+// Record written by apps/collector/screenshot_catalog.py (one per detection)
+export type CatalogRecord = {
+  id: string;
+  run_id: number | null;
+  marker: string | null;
+  template: string | null;
+  livesplit_current_time: string | null;
+  created: number;
+  screenshot_path: string;
+  path: string | null;
+  size: number;
+  width: number;
+  height: number;
+  phash: string;
+  duplicate_of: string | null;
+  thumb: string | null;
+  preview: string | null;
+};
+
+export type Screenshot = {
+  name: string;
+  size: number;
+  mtime: number;
+  id?: string;
+  run_id?: number | null;
+  marker?: string | null;
+  livesplit_current_time?: string | null;
+};
+
+export async function getScreenshotsDir(): Promise<string> {
+  const primary = path.join(process.cwd(), '..', '..', 'screenshots_cache');
+  const alt = path.join(process.cwd(), '..', '..', '..', 'screenshots_cache');
+  return fs
+    .stat(primary)
+    .then(() => primary)
+    .catch(async () => {
+      try {
+        await fs.stat(alt);
+        return alt;
+      } catch {
+        return primary;
+      }
+    });
+}
+
+type Catalog = {
+  records: CatalogRecord[];
+  // Lookup by detection id and by screenshot_path
+  byName: Map<string, CatalogRecord>;
+};
+
+let cached: { file: string; mtime: number; size: number; catalog: Catalog } | null = null;
+
+// Parsed catalog, or null when the collector hasn't written one yet.
+// Re-read only when the file changes, so a request costs a single stat.
+async function loadCatalog(): Promise<Catalog | null> {
+  const file = path.join(await getScreenshotsDir(), 'catalog.ndjson');
+  let stat;
+  try {
+    stat = await fs.stat(file);
+  } catch {
+    return null;
+  }
+  if (cached && cached.file === file && cached.mtime === stat.mtimeMs && cached.size === stat.size) {
+    return cached.catalog;
+  }
+
+  const content = await fs.readFile(file, 'utf-8');
+  const byId = new Map<string, CatalogRecord>();
+  for (const line of content.split('\n')) {
+    if (!line.trim()) continue;
+    try {
+      const record: CatalogRecord = JSON.parse(line);
+      // Later lines replace earlier ones; delete first to keep newest-last order
+      byId.delete(record.id);
+      byId.set(record.id, record);
+    } catch {
+      // partially written last line
+    }
+  }
+  const records = Array.from(byId.values());
+  const byName = new Map<string, CatalogRecord>();
+  for (const r of records) {
+    byName.set(r.screenshot_path, r);
+  }
+  // Ids win over paths; for id-less legacy entries they are the same string
+  for (const r of records) {
+    byName.set(r.id, r);
+  }
+  const catalog = { records, byName };
+  cached = { file, mtime: stat.mtimeMs, size: stat.size, catalog };
+  return catalog;
+}
+
+export async function readCatalog(): Promise<CatalogRecord[] | null> {
+  const catalog = await loadCatalog();
+  return catalog ? catalog.records : null;
+}
+
+export async function findRecord(name: string): Promise<CatalogRecord | undefined> {
+  const catalog = await loadCatalog();
+  return catalog?.byName.get(name);
+}
+
+// Gallery listing: unique frames from the catalog, falling back to the
+// top-level PNGs in screenshots_cache when there is no catalog.
+export async function listScreenshots(): Promise<Screenshot[]> {
+  const records = await readCatalog();
+  if (records) {
+    return records
+      .filter((r) => !r.duplicate_of)
+      .map((r) => ({
+        name: r.screenshot_path,
+        size: r.size,
+        mtime: r.created,
+        id: r.id,
+        run_id: r.run_id,
+        marker: r.marker,
+        livesplit_current_time: r.livesplit_current_time,
+      }))
+      .sort((a, b) => b.mtime - a.mtime);
+  }
+
+  try {
+    const dir = await getScreenshotsDir();
+    const entries = await fs.readdir(dir);
+    const files = await Promise.all(
+      entries
+        .filter((n) => n.toLowerCase().endsWith('.png'))
+        .map(async (name) => {
+          const stat = await fs.stat(path.join(dir, name));
+          return { name, size: stat.size, mtime: stat.mtimeMs };
+        })
+    );
+    files.sort((a, b) => b.mtime - a.mtime);
+    return files;
+  } catch {
+    return [];
+  }
+}